@@ -0,0 +1,99 @@
+"""Benchmark for rendering localized UI text.
+
+Renders every catalog message, and the per-product hints for every
+guess/target pair, in each locale, and reports the cost per render. With
+precompiled catalogs the cost should be flat across locales: the script
+exits with status 1 when the slowest locale is more than --max-spread times
+the fastest. Locales are timed in turn within each run, so drift in machine
+load hits all of them alike, and the best run of each is kept.
+
+Usage:
+    python bench_i18n.py --repeat 15 --max-spread 1.25
+"""
+import argparse
+import sys
+import time
+
+from energy_data import DATA_FILE, load_dataset
+from game_engine import CLOSE_DISTANCE, GUESS_FLOW, MAX_ROUNDS, MODERATE_DISTANCE, product_hints
+from i18n import load_catalogs, placeholders
+
+SAMPLE_ARGS = {
+    'round': 3,
+    'max_rounds': MAX_ROUNDS,
+    'close': CLOSE_DISTANCE,
+    'moderate': MODERATE_DISTANCE,
+    'guess': "France",
+    'product': "Renewables and waste",
+    'diff': 12.3456,
+    'country': "Italy",
+    'score': "🟨🟥",
+    'url': "https://energywordle.streamlit.app/",
+    'total': 17854,
+    'unit': "PJ",
+}
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark localized text rendering per locale.")
+    parser.add_argument('--data', default=DATA_FILE, help="Dataset used for the hint texts")
+    parser.add_argument('--repeat', type=int, default=15, help="Runs per measurement, the best one is kept")
+    parser.add_argument('--messages', type=int, default=200, help="Passes over the whole catalog per run")
+    parser.add_argument('--max-spread', type=float, default=1.25,
+                        help="Largest allowed ratio between the slowest and the fastest locale")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    catalogs = load_catalogs()
+    print(f"Compiled {len(catalogs)} catalogs in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    dataset = load_dataset(args.data)
+    shares = dataset.shares[GUESS_FLOW]
+    differences = [(guess, (shares.loc[guess] - shares.loc[target]) * 100)
+                   for guess in dataset.countries for target in dataset.countries if guess != target]
+
+    renders = {}
+    for locale, t in catalogs.items():
+        calls = [(key, {name: SAMPLE_ARGS[name] for name in placeholders(t.text(key))}) for key in t.keys()]
+
+        def render_messages(t=t, calls=calls):
+            for _ in range(args.messages):
+                for key, kwargs in calls:
+                    t(key, **kwargs)
+
+        def render_hints(t=t):
+            for guess, share_difference in differences:
+                product_hints(t, guess, share_difference)
+
+        renders[locale] = (render_messages, args.messages * len(calls)), (render_hints, len(differences))
+
+    # Best time per render for each locale, taking turns within every run
+    results = {locale: [float('inf'), float('inf')] for locale in catalogs}
+    for _ in range(args.repeat):
+        for locale, measurements in renders.items():
+            for column, (func, count) in enumerate(measurements):
+                results[locale][column] = min(results[locale][column], timed(func) / count * 1e6)
+
+    print(f"{'locale':>8} {'us/message':>11} {'us/hint set':>12}")
+    for locale, (per_message, per_hint_set) in results.items():
+        print(f"{locale:>8} {per_message:>11.3f} {per_hint_set:>12.2f}")
+
+    flat = True
+    for column, label in enumerate(("message", "hint set")):
+        costs = [result[column] for result in results.values()]
+        spread = max(costs) / min(costs)
+        flat = flat and spread <= args.max_spread
+        print(f"Spread per {label}: slowest locale is {spread:.2f}x the fastest (limit {args.max_spread:.2f}x)")
+    if not flat:
+        print("Rendering cost is not flat across locales")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
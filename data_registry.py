@@ -0,0 +1,131 @@
+"""Versioned datasets with background refresh.
+
+The registry serves the current dataset to new sessions. An admin refresh
+ingests a new file from a background thread. Parsing, validation, dense
+tables and distance matrices are built in a separate process, so the work
+does not compete with live sessions for the GIL; only the finished dataset
+is sent back and swapped in. Figures are built on first use. Sessions keep a
+reference to the version they started with, so games in progress are
+unaffected. Old versions are tracked weakly and are freed as soon as the
+last session holding them is gone.
+
+A new version is only swapped in, and an upload only replaces the data
+file, if it passes validation and still has the flows and countries the
+app needs; otherwise the refresh is rejected and the reason is shown in
+the status.
+"""
+import gc
+import logging
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from energy_data import DataValidationError, content_version, load_dataset
+
+logger = logging.getLogger(__name__)
+
+
+# Runs in the refresh process
+def _build_dataset(file_path):
+    dataset = load_dataset(file_path)
+    dataset.warm()
+    return dataset
+
+
+class DatasetRegistry:
+    def __init__(self, file_path, required_flows=(), required_countries=()):
+        self.file_path = file_path
+        self.required_flows = required_flows
+        self.required_countries = required_countries
+        self._lock = threading.Lock()
+        self._versions = weakref.WeakValueDictionary()
+        self._refresh_thread = None
+        self.status = ""
+        self._current = self._register(load_dataset(file_path))
+
+    def _register(self, dataset):
+        self._versions[dataset.version] = dataset
+        return dataset
+
+    # Reasons why a dataset cannot be served, empty if it can
+    def problems(self, dataset):
+        problems = []
+        if not dataset.countries:
+            problems.append("no countries")
+        problems += [f"flow {flow!r} is missing" for flow in self.required_flows if flow not in dataset.flows]
+        problems += [f"country {country!r} is missing" for country in self.required_countries
+                     if country not in dataset.countries]
+        return problems
+
+    def current(self):
+        return self._current
+
+    def get(self, version):
+        return self._versions.get(version)
+
+    # Versions still held by the registry or by at least one session
+    def live_versions(self):
+        return sorted(self._versions.keys())
+
+    @property
+    def refreshing(self):
+        return self._refresh_thread is not None and self._refresh_thread.is_alive()
+
+    # Start a background refresh from the data file, or from uploaded content
+    # which replaces the data file once it has been ingested successfully.
+    # Returns False if a refresh is already running.
+    def refresh(self, content=None):
+        with self._lock:
+            if self.refreshing:
+                return False
+            self.status = f"Refresh started at {datetime.now():%H:%M:%S}"
+            self._refresh_thread = threading.Thread(target=self._refresh, args=(content,), daemon=True)
+            self._refresh_thread.start()
+            return True
+
+    def _refresh(self, content):
+        source = self.file_path
+        try:
+            if content is not None:
+                if content_version(content) == self._current.version:
+                    self.status = f"Uploaded file matches the current version {self._current.version}"
+                    return
+                source = f"{self.file_path}.upload"
+                with open(source, 'wb') as f:
+                    f.write(content)
+
+            # A fresh interpreter rather than a fork of the threaded server
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                dataset = executor.submit(_build_dataset, source).result()
+            if dataset.version == self._current.version:
+                self.status = f"Data file unchanged, still on version {dataset.version}"
+                return
+            problems = self.problems(dataset)
+            if problems:
+                self.status = f"Refresh rejected, version {dataset.version} is not usable: {'; '.join(problems)}"
+                logger.error(self.status)
+                return
+
+            if content is not None:
+                os.replace(source, self.file_path)
+                dataset.source = self.file_path
+
+            with self._lock:
+                previous = self._current
+                self._current = self._register(dataset)
+            self.status = f"Switched from version {previous.version} to {dataset.version} at {datetime.now():%H:%M:%S}"
+            logger.info(self.status)
+            del previous
+            gc.collect()
+        except DataValidationError as exc:
+            self.status = f"Refresh rejected, the file is not usable: {exc}"
+            logger.error("%s\n%s", self.status, exc.report)
+        except Exception as exc:
+            self.status = f"Refresh failed: {exc}"
+            logger.exception("Dataset refresh from %s failed", source)
+        finally:
+            if source != self.file_path and os.path.exists(source):
+                os.remove(source)
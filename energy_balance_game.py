@@ -1,14 +1,17 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import random
-import numpy as np
 import os
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from datetime import datetime
 
+from data_registry import DatasetRegistry
+from game_engine import (CLOSE_DISTANCE, GUESS_FLOW, MAX_ROUNDS, MODERATE_DISTANCE, distance, game_record,
+                         new_seed, pick_target, product_hints, score_emoji, score_line)
+from i18n import DEFAULT_LOCALE, load_catalogs
+
 # CSS to scale the app content
 st.markdown(
     """
@@ -29,9 +32,28 @@ smtp_password = st.secrets["smtp_password"]
 random_mode = st.secrets["random_mode"]
 fixed_country = st.secrets["fixed_country"]
 
+# Optional seed shared by every player (same target for everyone), otherwise
+# each game draws its own seed so it can still be replayed later
+fixed_seed = st.secrets.get("seed")
+
+# Optional JSON lines file where every finished game is recorded for replay
+game_archive = st.secrets.get("game_archive")
+
+# Optional token that unlocks the admin panel through ?admin=<token>
+admin_token = st.secrets.get("admin_token")
+
+# Locale used until the player picks another one
+default_locale = st.secrets.get("default_locale", DEFAULT_LOCALE)
+
+# SMTP endpoint (overridable so load tests can point it at a local stand-in)
+smtp_server = st.secrets.get("smtp_server", "smtp.gmail.com")
+smtp_port = int(st.secrets.get("smtp_port", 587))
+smtp_starttls = st.secrets.get("smtp_starttls", True)
+
+# st.experimental_rerun was removed in recent Streamlit releases
+rerun = getattr(st, "rerun", None) or st.experimental_rerun
+
 def send_email(to_emails, subject, content):
-    smtp_server = "smtp.gmail.com"
-    smtp_port = 587
 
     # Create the message
     msg = MIMEMultipart()
@@ -47,21 +69,53 @@ def send_email(to_emails, subject, content):
 
     # Send the email
     server = smtplib.SMTP(smtp_server, smtp_port)
-    server.starttls()
+    if smtp_starttls:
+        server.starttls()
     server.login(smtp_user, smtp_password)
     server.send_message(msg)
     server.quit()
 
-# Load the CSV file
+app_url = "https://energywordle.streamlit.app/"
+
+# Load, validate and reshape the CSV file once per server process; the
+# registry swaps in refreshed versions without a restart
 file_path = 'WorldEnergyBalancesHighlights2023.csv'
-energy_data = pd.read_csv(file_path)
 
-# Convert the '2021' column to numeric, errors='coerce' will replace non-convertible values with NaN
-energy_data['2021'] = pd.to_numeric(energy_data['2021'], errors='coerce')
+# Flow shown first on the game page and in the final charts
+default_flow = "Production (PJ)"
+
+@st.cache_resource
+def get_registry(file_path, required_flows, required_countries):
+    return DatasetRegistry(file_path, required_flows, required_countries)
+
+# Refreshed versions must still have everything the game needs
+registry = get_registry(file_path, (GUESS_FLOW, default_flow), () if random_mode else (fixed_country,))
+
+# Each session stays on the dataset version it started with while its game
+# is in progress. A finished game moves to the current version, if that still
+# has every country of the game, so old versions are freed without waiting
+# for the session to expire.
+current_dataset = registry.current()
+if 'dataset' not in st.session_state:
+    st.session_state.dataset = current_dataset
+elif st.session_state.dataset is not current_dataset and \
+        (st.session_state.round >= MAX_ROUNDS or st.session_state.correct):
+    game_countries = {st.session_state.selected_country} | {answer['guess'] for answer in st.session_state.answers}
+    if game_countries <= set(current_dataset.countries):
+        st.session_state.dataset = current_dataset
+dataset = st.session_state.dataset
+color_palette = dataset.colors
 
 # Extract unique flows and countries
-flows = energy_data['Flow'].unique()
-countries = sorted(energy_data['Country'].unique())
+flows = dataset.flows
+countries = dataset.countries
+
+# UI text catalogs, compiled once per server process
+@st.cache_resource
+def get_catalogs():
+    return load_catalogs()
+
+catalogs = get_catalogs()
 
 if 'username' not in st.session_state:
     st.session_state.username = ""
@@ -71,27 +125,47 @@ if 'end_time' not in st.session_state:
     st.session_state.end_time = None
 if 'round' not in st.session_state:
     st.session_state.round = 0
+if 'seed' not in st.session_state:
+    st.session_state.seed = fixed_seed if fixed_seed is not None else new_seed()
 if 'selected_country' not in st.session_state:
-    st.session_state.selected_country = random.choice(countries) if random_mode else fixed_country
+    st.session_state.selected_country = pick_target(countries, st.session_state.seed) if random_mode else fixed_country
 if 'correct' not in st.session_state:
     st.session_state.correct = False
 if 'answers' not in st.session_state:
     st.session_state.answers = []
 if 'final_flow' not in st.session_state:
-    st.session_state.final_flow = "Production (PJ)"  # Default flow for final charts
+    st.session_state.final_flow = default_flow  # Default flow for final charts
+if 'summary_sent' not in st.session_state:
+    st.session_state.summary_sent = False
+if 'locale' not in st.session_state:
+    requested_locale = st.query_params.get("lang", default_locale)
+    st.session_state.locale = requested_locale if requested_locale in catalogs else DEFAULT_LOCALE
+
+# Language selection only switches the catalog, no data is processed again
+st.sidebar.selectbox(catalogs[st.session_state.locale]("language_label"), list(catalogs),
+                     format_func=lambda locale: catalogs[locale].name, key='locale')
+t = catalogs[st.session_state.locale]
 
 # Function to reset the game state
 def reset_game():
     st.session_state.round = 0
-    st.session_state.selected_country = random.choice(countries) if random_mode else fixed_country
+    st.session_state.dataset = registry.current()
+    st.session_state.seed = fixed_seed if fixed_seed is not None else new_seed()
+    st.session_state.selected_country = pick_target(st.session_state.dataset.countries, st.session_state.seed) if random_mode else fixed_country
     st.session_state.correct = False
     st.session_state.answers = []
     st.session_state.start_time = None
     st.session_state.end_time = None
+    st.session_state.summary_sent = False
 
 
-# Function to handle the email sending
+# Function to handle the email sending and game recording
 def send_game_summary():
+    # Only once per game, not on every rerun of the results
+    if st.session_state.summary_sent:
+        return
+    st.session_state.summary_sent = True
+
     username = st.session_state.username
     start_time = st.session_state.start_time
     end_time = st.session_state.end_time
@@ -105,194 +179,104 @@ def send_game_summary():
     for answer in answers:
         summary += f"Round {answers.index(answer) + 1}: {answer['guess']}\n"
     summary += f"Correct Country: {selected_country}\n"
-    
+
+    # Machine readable record used by replay.py
+    guesses = [answer['guess'] for answer in answers]
+    if st.session_state.correct:
+        guesses.append(selected_country)
+    record = game_record(username, st.session_state.seed, selected_country, guesses,
+                         st.session_state.correct, start_time, end_time)
+    summary += f"Record: {record}\n"
+    if game_archive:
+        with open(game_archive, 'a', encoding='utf-8') as f:
+            f.write(record + "\n")
+
     send_email([smtp_user], "Energy Wordle Game Summary", summary)
 
 # Main game page
 def main_game():
     if not st.session_state.username:
-        st.session_state.username = st.text_input("Enter your username to start the game:")
-        if st.button("Start Game"):
+        st.session_state.username = st.text_input(t("username_prompt"), key='username_input')
+        if st.button(t("start_button")):
             if st.session_state.username:
                 st.session_state.start_time = datetime.now()
-                st.experimental_rerun()
+                rerun()
             else:
-                st.error("Please enter a username to start the game.")
+                st.error(t("username_missing"))
     else:
-        st.title("Weekly Energy Balance Guessing Game")
-
-        with st.expander("About the Data", expanded=False):
-            st.markdown("""
-            The World Energy Balances online data service contains energy balances for 156 countries and 35 regional aggregates. 
-            The figures are expressed in thousand tonnes of oil equivalent (ktoe) and in terajoules. Conversion factors used to calculate energy balances and indicators 
-            (including GDP, population, industrial production index and ratios calculated with the energy data) are also provided. The database includes transparent notes 
-            on methodologies and sources for country-level data. In general, the data are available from 1971 (1960 for OECD countries) to 2021. Preliminary 2022 data are 
-            available for select countries, products, and flows. This service is updated twice a year with progressively broader geographical coverage: in April and July, 
-            the final edition with global data for year-2.
-
-            Note: This game is based on the IEA family countries, which include members, accession, and association countries.
-
-            Source: [IEA World Energy Balances](https://www.iea.org/data-and-statistics/data-product/world-energy-balances#energy-balances)
-            """)
-
-        with st.expander("How to Play", expanded=True):
-            st.markdown("""
-            ### How to Play
-            1. Each week, a specific country's energy balance data will be selected. Analyze the treemap and the total value of all products for clues about the country's energy mix.
-            2. You have 5 attempts to guess the country correctly.
-            3. Enter your guess in the dropdown menu and click "Submit Guess".
-            4. If your guess is incorrect, the game will show you the difference in shares between your guess and the correct country using a bar chart. The default flow is "Production (PJ)" and differences should also apply to the "Total Final Consumption (PJ)" values.
-            5. The bar chart displays the percentage difference for each product, helping you refine your next guess.
-            6. Your previous guesses will be shown on the sidebar, color-coded based on their accuracy: 
-               - Green for close (average share difference < 5%)
-               - Yellow for moderate (average share difference between 5% and 15%)
-               - Red for far (average share difference > 15%)
-            7. The game ends when you guess the correct country or use all 5 attempts. Good luck!
-            """)
-
-        # Set default flow
-        default_flow = "Production (PJ)"
-
-        st.markdown("""
-        ### Energy Mix Treemap
-        The treemap below shows the energy mix for the selected flow. Each rectangle represents a product, sized proportionally to its total value. The percentage share of each product is also displayed. Use this visualization to analyze the energy profile of the selected country.
-        """)
+        st.title(t("title"))
 
-        # Flow selection dropdown
-        selected_flow = st.selectbox("Select a Flow to investigate:", flows, index=list(flows).index(default_flow))
+        with st.expander(t("about_title"), expanded=False):
+            st.markdown(t("about_body"))
 
-        # Determine the unit of measure based on the selected flow
-        if selected_flow == "Electricity output (GWh)":
-            unit_of_measure = "GWh"
-        else:
-            unit_of_measure = "PJ"
+        with st.expander(t("how_to_play_title"), expanded=True):
+            st.markdown(t("how_to_play_body", max_rounds=MAX_ROUNDS, close=CLOSE_DISTANCE, moderate=MODERATE_DISTANCE))
 
-        # Filter data by the selected flow
-        filtered_data = energy_data[energy_data['Flow'] == selected_flow]
+        st.markdown(t("treemap_intro"))
 
-        # Filter data for total final consumption only
-        filter_data = energy_data[energy_data['Flow'] == "Production (PJ)"]
+        # Flow selection dropdown
+        selected_flow = st.selectbox(t("flow_label"), flows, index=list(flows).index(default_flow), key='flow_selectbox')
 
-        # Selected country and filtering data
         selected_country = st.session_state.selected_country
-        country_data = filtered_data[filtered_data['Country'] == selected_country]
-        filter_country_data = filter_data[filter_data['Country'] == selected_country]
-
-        # Define the color palette
-        color_palette = {
-            "Coal, peat and oil shale": "#4B5320",
-            "Crude, NGL and feedstocks": "#A52A2A",
-            "Oil products": "#FF8C00",
-            "Natural gas": "#1E90FF",
-            "Nuclear": "#FFD700",
-            "Renewables and waste": "#32CD32",
-            "Electricity": "#9400D3",
-            "Heat": "#FF4500",
-            "Fossil fuels": "#708090",
-            "Renewable sources": "#00FA9A"
-        }
-
-        # Display total value for the country
-        total_value = int(country_data['2021'].sum())
-
-        # Display the treemap with percentage shares
-        country_data['Percentage'] = (country_data['2021'] / total_value * 100).round(1)
-        fig = px.treemap(country_data, path=['Product'], values='2021', title=f"Energy Mix: (Total value for all products: {total_value} {unit_of_measure})",
-                         color='Product', color_discrete_map=color_palette,
-                         custom_data=['Percentage'])
-        fig.update_traces(texttemplate='%{label}<br>%{value:.1f}<br>%{customdata[0]}%', hovertemplate=None)
-        fig.update_layout(height=600, width=800)
-        st.plotly_chart(fig)
+
+        # Production shares used to compare guesses
+        production_shares = dataset.shares[GUESS_FLOW]
+
+        # Display the treemap with the total value and percentage shares (built once per dataset version)
+        st.plotly_chart(dataset.treemap(selected_flow, selected_country, t.text("treemap_title")))
 
         # Separator
         st.markdown('---')
 
-        if st.session_state.round < 5 and not st.session_state.correct:
+        if st.session_state.round < MAX_ROUNDS and not st.session_state.correct:
             # Guessing section
-            st.write(f"Round {st.session_state.round + 1} of 5")
-            guess = st.selectbox("Guess the Country:", [country for country in countries])
-            if st.button("Submit Guess"):
+            st.write(t("round_counter", round=st.session_state.round + 1, max_rounds=MAX_ROUNDS))
+            guess = st.selectbox(t("guess_label"), [country for country in countries], key='guess_selectbox')
+            if st.button(t("submit_button")):
                 st.session_state.round += 1
                 if guess == selected_country:
                     st.session_state.correct = True
                 else:
-                    guessed_country_data = filter_data[filter_data['Country'] == guess]
-                    guessed_country_data = guessed_country_data.set_index('Product').reindex(filter_country_data['Product']).fillna(0)
-                    guessed_country_data['2021'] = guessed_country_data['2021'].replace(np.nan, 0)
-                    filter_country_data = filter_country_data.set_index('Product').reindex(guessed_country_data.index).fillna(0)
-
-                    guessed_share = guessed_country_data['2021'] / guessed_country_data['2021'].sum()
-                    correct_share = filter_country_data['2021'] / filter_country_data['2021'].sum()
+                    guessed_share = production_shares.loc[guess]
+                    correct_share = production_shares.loc[selected_country]
                     share_difference = (guessed_share - correct_share) * 100
 
-                    distance = share_difference.abs().mean()
                     st.session_state.answers.append({
                         'guess': guess,
-                        'distance': distance
+                        'distance': distance(production_shares, guess, selected_country)
                     })
 
-                    st.write("Incorrect Guess!")
-                    st.write(f"Shares for {guess} vs Correct Shares:")
+                    st.write(t("incorrect_guess"))
+                    st.write(t("shares_comparison", guess=guess))
 
-                    st.markdown("""
-                    The bar chart below shows the production percentage difference for each product between your guessed country and the correct country. This will help you understand how close your guess was and refine your next guess.
-                    """)
+                    st.markdown(t("difference_intro"))
 
                     # Display horizontal bar chart with differences sorted by absolute difference
                     distance_data = pd.DataFrame({
-                        'Product': guessed_country_data.index,
-                        'Difference (%)': share_difference
-                    }).reset_index(drop=True).sort_values(by='Difference (%)', ascending=False, key=abs)
+                        'Product': share_difference.index,
+                        'Difference (%)': share_difference.values
+                    }).sort_values(by='Difference (%)', ascending=False, key=abs)
 
-                    fig_distance = px.bar(distance_data, y='Product', x='Difference (%)', title="Difference per Product (%)",
+                    fig_distance = px.bar(distance_data, y='Product', x='Difference (%)', title=t("difference_chart_title"),
                                           color='Product', color_discrete_map=color_palette, orientation='h')
                     fig_distance.update_layout(xaxis_title=None, yaxis_title=None)
                     st.plotly_chart(fig_distance)
 
-                    # Generate explanations for each product
-                    explanations = []
-                    for _, row in distance_data.iterrows():
-                        product = row['Product']
-                        diff = row['Difference (%)']
-                        guessed_country_name = guess  # Use the actual guessed country name
-                        if diff != 0:
-                            if diff > 0:
-                                explanation = f"{guessed_country_name} has a share of **{product}** in production that is **{abs(diff):.2f}% higher** than the target country."
-                                if abs(diff) < 5:
-                                    explanation += " You were very close, you're on the right track with this product's share."
-                                elif 5 <= abs(diff) < 15:
-                                    explanation += " You are looking for a country that produces slightly less of this product (as a share)."
-                                elif 15 <= abs(diff) < 30:
-                                    explanation += " You are looking for a country that produces less of this product (as a share)."
-                                else:
-                                    explanation += " You are looking for a country that produces much less of this product (as a share)."
-                            else:
-                                explanation = f"{guessed_country_name} has a share of **{product}** in production that is **{abs(diff):.2f}% lower** than the target country."
-                                if abs(diff) < 5:
-                                    explanation += " You were very close, you're on the right track with this product's share."
-                                elif 5 <= abs(diff) < 15:
-                                    explanation += " You are looking for a country that produces slightly more of this product (as a share)."
-                                elif 15 <= abs(diff) < 30:
-                                    explanation += " You are looking for a country that produces more of this product (as a share)."
-                                else:
-                                    explanation += " You are looking for a country that produces much more of this product (as a share)."
-                            explanations.append((diff, explanation, product))
-
-                    # Sort explanations by absolute difference in descending order
-                    explanations.sort(key=lambda x: abs(x[0]), reverse=True)
-
-                    with st.expander("Detailed Differences", expanded=False):
+                    # Generate explanations for each product, sorted by absolute difference in descending order
+                    explanations = product_hints(t, guess, share_difference)
+
+                    with st.expander(t("detailed_differences"), expanded=False):
                         for _, explanation, product in explanations:
                             product_color = color_palette[product]
                             st.markdown(f"<span style='color:{product_color}'>{explanation}</span>", unsafe_allow_html=True)
 
-        if st.session_state.round == 5 or st.session_state.correct:
+        if st.session_state.round == MAX_ROUNDS or st.session_state.correct:
             if st.session_state.correct:
-                st.success(f"Congratulations! You guessed the correct country: {selected_country}")
+                st.success(t("congratulations", country=selected_country))
             else:
-                st.error(f"Game Over! The correct country was: {selected_country}")
+                st.error(t("game_over", country=selected_country))
 
-            st.markdown("Want to explore the results? Click on the top left 'Explore the Results'.")
+            st.markdown(t("explore_prompt"))
             
             # Record end time
             st.session_state.end_time = datetime.now()
@@ -308,38 +292,29 @@ def main_game():
                 elif "china" in country_url:
                     country_url = "china"
                 country_links.append(f"[{country}](https://www.iea.org/countries/{country_url})")
-            st.markdown("### Learn more about these countries' energy sectors:")
+            st.markdown(t("learn_more"))
             st.markdown(", ".join(country_links))
             
             # Share your score text
-            score = ""
-            for answer in st.session_state.answers:
-                distance = answer['distance']
-                if distance < 5:
-                    score += "🟩"
-                elif distance < 15:
-                    score += "🟨"
-                else:
-                    score += "🟥"
+            score = score_line([answer['distance'] for answer in st.session_state.answers],
+                               st.session_state.correct, st.session_state.round)
 
             if st.session_state.correct:
-                if st.session_state.round == 1:
-                    score = "🟩"
-                result_text = f"Here's my results in today #energywordle: {st.session_state.round}/5\n{score} https://energywordle.streamlit.app/"
+                result_text = t("share_win", round=st.session_state.round, max_rounds=MAX_ROUNDS, score=score, url=app_url)
             else:
-                result_text = f"I failed at today's energy wordle, can you make it?\n{score} https://energywordle.streamlit.app/"
+                result_text = t("share_loss", score=score, url=app_url)
             
-            st.markdown("**Share your score:**")
+            st.markdown(t("share_label"))
             st.text_area("", result_text, height=100)
 
-            st.write("Come back next Tuesday morning for the next match. In the meantime, explore your results.")
+            st.write(t("come_back"))
             
             # Send game summary email
             send_game_summary()
 
 # Explore results page
 def explore_results():
-    st.title("Explore the Results")
+    st.title(t("explore_title"))
 
     # Collect involved countries
     countries_involved = [st.session_state.selected_country] + list(set([answer['guess'] for answer in reversed(st.session_state.answers) if answer['guess'] != st.session_state.selected_country]))
@@ -349,55 +324,37 @@ def explore_results():
     
     # Dropdown menu to select flow for final charts
     selected_flow_final = st.selectbox(
-        "Select a Flow for final charts:",
+        t("final_flow_label"),
         flows,
         index=list(flows).index(st.session_state.final_flow),
         key='final_flow_selectbox'
     )
 
-    final_filtered_data = energy_data[energy_data['Flow'] == selected_flow_final]
-
     # Get unique products for the selected flow
-    unique_products = final_filtered_data['Product'].unique()
+    unique_products = dataset.products(selected_flow_final)
 
-    # Prepare data for final charts
-    final_chart_data = final_filtered_data[final_filtered_data['Country'].isin(countries_involved)]
-    final_chart_data['Country'] = pd.Categorical(final_chart_data['Country'], categories=countries_involved, ordered=True)
-
-    # Reorder the dataframe based on the categorical order
-    final_chart_data = final_chart_data.sort_values(by='Country')
-
-    # Add empty rows for each product
+    # Empty rows for each product
     empty_rows = pd.DataFrame({
         "Country": [" "] * len(unique_products),
-        "Flow": [selected_flow_final] * len(unique_products),
         "Product": unique_products,
-        "2021": [0] * len(unique_products)
+        "Flow": [selected_flow_final] * len(unique_products),
+        "2021": [0.0] * len(unique_products),
+        "Percentage": [0.0] * len(unique_products)
     })
-    final_chart_data = pd.concat([final_chart_data.iloc[:len(unique_products)], empty_rows, final_chart_data.iloc[len(unique_products):]]).reset_index(drop=True)
-
-    # Define the color palette
-    color_palette = {
-        "Coal, peat and oil shale": "#4B5320",
-        "Crude, NGL and feedstocks": "#A52A2A",
-        "Oil products": "#FF8C00",
-        "Natural gas": "#1E90FF",
-        "Nuclear": "#FFD700",
-        "Renewables and waste": "#32CD32",
-        "Electricity": "#9400D3",
-        "Heat": "#FF4500",
-        "Fossil fuels": "#708090",
-        "Renewable sources": "#00FA9A"
-    }
+
+    # Prepare data for final charts in the order of countries_involved
+    final_chart_data = pd.concat([
+        empty_rows if country == " " else dataset.frames[(selected_flow_final, country)]
+        for country in countries_involved
+    ], ignore_index=True)
 
     # Stacked bar chart for total values
-    fig_stacked = px.bar(final_chart_data, x='Country', y='2021', color='Product', title="Total Values by Country",
+    fig_stacked = px.bar(final_chart_data, x='Country', y='2021', color='Product', title=t("total_values_title"),
                          color_discrete_map=color_palette)
     st.plotly_chart(fig_stacked)
 
     # Stacked 100% bar chart for relative shares
-    final_chart_data['Percentage'] = final_chart_data.groupby('Country')['2021'].transform(lambda x: x / x.sum() * 100)
-    fig_stacked_100 = px.bar(final_chart_data, x='Country', y='Percentage', color='Product', title="Relative Shares by Country",
+    fig_stacked_100 = px.bar(final_chart_data, x='Country', y='Percentage', color='Product', title=t("relative_shares_title"),
                              color_discrete_map=color_palette)
     st.plotly_chart(fig_stacked_100)
 
@@ -411,33 +368,46 @@ def explore_results():
             elif "china" in country_url:
                 country_url = "china"
             country_links.append(f"[{country}](https://www.iea.org/countries/{country_url})")
-    st.markdown("### Learn more about these countries' energy sectors:")
+    st.markdown(t("learn_more"))
     st.markdown(", ".join(country_links))
 
 # Sidebar navigation
-nav_option = st.sidebar.radio("Navigation", ["Play Game", "Explore the Results"])
+nav_option = st.sidebar.radio(t("nav_label"), ["nav_play", "nav_explore"], format_func=t, key='nav_radio')
 
-if nav_option == "Explore the Results":
-    if st.session_state.round < 5 and not st.session_state.correct:
-        st.warning("Go back to the game and once you've finished it, come here to explore the results.")
+if nav_option == "nav_explore":
+    if st.session_state.round < MAX_ROUNDS and not st.session_state.correct:
+        st.warning(t("finish_first"))
     else:
         explore_results()
 else:
     main_game()
 
 # Sidebar to display guessed countries and distances with colored squares
-st.sidebar.header("Guessed Countries and Distances")
+st.sidebar.header(t("sidebar_header"))
 if st.session_state.answers:
     for answer in st.session_state.answers:
-        distance = answer['distance']
-        if distance < 5:
-            color = '🟩'
-        elif distance < 15:
-            color = '🟨'
-        else:
-            color = '🟥'
+        color = score_emoji(answer['distance'])
         sidebar_text = f"{color} {answer['guess']}"
         st.sidebar.markdown(sidebar_text)
 
+# Admin panel to refresh the dataset without restarting the app
+if admin_token and st.query_params.get("admin") == admin_token:
+    st.sidebar.markdown('---')
+    with st.sidebar.expander("Admin: data refresh", expanded=True):
+        st.write(f"Current version: {registry.current().version}")
+        st.write(f"This session: {dataset.version}")
+        st.write(f"Versions in memory: {', '.join(registry.live_versions())}")
+        uploaded_file = st.file_uploader("New data file (CSV)", type="csv")
+        if st.button("Refresh data", disabled=registry.refreshing):
+            content = uploaded_file.getvalue() if uploaded_file is not None else None
+            if not registry.refresh(content):
+                st.warning("A refresh is already running.")
+        if registry.refreshing:
+            st.info("Refresh in progress...")
+        if registry.status:
+            st.write(registry.status)
+        if dataset.report:
+            st.text(str(dataset.report))
+
 st.sidebar.markdown('---')
-st.sidebar.markdown("Developed by [Darlain Edeme](https://www.linkedin.com/in/darlain-edeme/)")
+st.sidebar.markdown(t("developed_by"))
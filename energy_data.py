@@ -0,0 +1,248 @@
+"""Loading and validation of the World Energy Balances extract.
+
+The CSV is checked once when it is loaded and turned into a clean, dense
+dataset: every country has a value for every product of every flow, values
+are plain floats and shares are already normalized. The game can then read
+from it directly, without any reindex/fillna work on each rerun.
+
+Each dataset carries a version (a hash of the file content) so that several
+releases can be loaded side by side while sessions are pinned to one of them.
+
+Run `python energy_data.py [file]` to print the validation report; it exits
+with status 1 when the file cannot be used.
+"""
+import hashlib
+import io
+import logging
+import sys
+
+import pandas as pd
+import plotly.express as px
+
+from game_engine import GUESS_FLOW, distance_matrix
+
+logger = logging.getLogger(__name__)
+
+DATA_FILE = 'WorldEnergyBalancesHighlights2023.csv'
+YEAR = '2021'
+
+# Colors used for each product in every chart
+COLOR_PALETTE = {
+    "Coal, peat and oil shale": "#4B5320",
+    "Crude, NGL and feedstocks": "#A52A2A",
+    "Oil products": "#FF8C00",
+    "Natural gas": "#1E90FF",
+    "Nuclear": "#FFD700",
+    "Renewables and waste": "#32CD32",
+    "Electricity": "#9400D3",
+    "Heat": "#FF4500",
+    "Fossil fuels": "#708090",
+    "Renewable sources": "#00FA9A"
+}
+# Color for products that are missing from the palette
+FALLBACK_COLOR = "#A9A9A9"
+
+COLUMNS = ['Country', 'Product', 'Flow', YEAR]
+
+# Checks that make a file unusable; every other check only warns
+FATAL_CHECKS = ('missing_column', 'empty', 'missing_flow')
+
+TREEMAP_TITLE = "Energy Mix: (Total value for all products: {total} {unit})"
+
+
+def unit_of_measure(flow):
+    return "GWh" if flow == "Electricity output (GWh)" else "PJ"
+
+
+def content_version(content):
+    return hashlib.sha256(content).hexdigest()[:12]
+
+
+# Treemap of one country's products with their values and percentage shares
+def treemap_figure(frame, flow, total, colors, title=TREEMAP_TITLE):
+    fig = px.treemap(frame, path=['Product'], values=YEAR,
+                     title=title.format(total=int(total), unit=unit_of_measure(flow)),
+                     color='Product', color_discrete_map=colors,
+                     custom_data=['Percentage'])
+    fig.update_traces(texttemplate='%{label}<br>%{value:.1f}<br>%{customdata[0]}%', hovertemplate=None)
+    fig.update_layout(height=600, width=800)
+    return fig
+
+
+class ValidationReport:
+    def __init__(self):
+        self.issues = []
+
+    def add(self, check, message):
+        self.issues.append((check, message))
+
+    def count(self, check):
+        return sum(1 for issue_check, _ in self.issues if issue_check == check)
+
+    @property
+    def fatal(self):
+        return [(check, message) for check, message in self.issues if check in FATAL_CHECKS]
+
+    def __bool__(self):
+        return bool(self.issues)
+
+    def __str__(self):
+        if not self.issues:
+            return "Validation passed: no issues found."
+        lines = [f"Validation found {len(self.issues)} issue(s):"]
+        lines += [f"  [{check}] {message}" for check, message in self.issues]
+        return "\n".join(lines)
+
+
+class DataValidationError(ValueError):
+    def __init__(self, report):
+        self.report = report
+        super().__init__("; ".join(message for _, message in report.fatal))
+
+    # Raised in the refresh process and sent back to the server
+    def __reduce__(self):
+        return DataValidationError, (self.report,)
+
+
+class EnergyDataset:
+    def __init__(self, data, report, version=None, source=None):
+        # Clean long table: one row per flow, country and product, no NaNs
+        self.data = data
+        self.report = report
+        self.version = version
+        self.source = source
+        self.flows = list(data['Flow'].unique())
+        self.countries = sorted(data['Country'].unique())
+        self.colors = {product: COLOR_PALETTE.get(product, FALLBACK_COLOR) for product in data['Product'].unique()}
+
+        # Dense country x product tables per flow
+        self.values = {}
+        self.totals = {}
+        self.shares = {}
+        for flow, flow_data in data.groupby('Flow', sort=False):
+            values = flow_data.pivot(index='Country', columns='Product', values=YEAR)
+            values = values[list(flow_data['Product'].unique())]
+            self.values[flow] = values
+            self.totals[flow] = values.sum(axis=1)
+            self.shares[flow] = values.div(self.totals[flow].where(self.totals[flow] != 0), axis=0).fillna(0)
+
+        # Ready-to-plot slices per (flow, country)
+        self.frames = {key: frame.reset_index(drop=True) for key, frame in data.groupby(['Flow', 'Country'], sort=False)}
+
+        # Built on first use, or up front by warm()
+        self._distances = {}
+        self._figures = {}
+
+    def products(self, flow):
+        return list(self.values[flow].columns)
+
+    # Mean absolute share difference (in %) between every pair of countries,
+    # rows are guesses and columns are targets
+    def distances(self, flow):
+        if flow not in self._distances:
+            self._distances[flow] = pd.DataFrame(distance_matrix(self.shares[flow]),
+                                                 index=self.countries, columns=self.countries)
+        return self._distances[flow]
+
+    # Treemap of a country's energy mix; figures are shared between sessions,
+    # so callers must not modify them
+    def treemap(self, flow, country, title=TREEMAP_TITLE):
+        key = (flow, country, title)
+        if key not in self._figures:
+            self._figures[key] = treemap_figure(self.frames[(flow, country)], flow, self.totals[flow][country],
+                                                self.colors, title)
+        return self._figures[key]
+
+    # Build derived structures up front; figures are many and slow to build,
+    # so they are only included on request
+    def warm(self, figures=False):
+        for flow in self.flows:
+            self.distances(flow)
+            if figures:
+                for country in self.countries:
+                    self.treemap(flow, country)
+
+
+def validate(energy_data):
+    report = ValidationReport()
+    for column in COLUMNS:
+        if column not in energy_data.columns:
+            report.add('missing_column', f"{column}: required column is missing")
+    if energy_data.empty:
+        report.add('empty', "no data rows")
+    if report.fatal:
+        raise DataValidationError(report)
+    data = energy_data[COLUMNS].copy()
+
+    # Non-numeric values ('..', 'c', ...) become NaN and are counted as 0
+    numeric = pd.to_numeric(data[YEAR], errors='coerce')
+    coerced = data[numeric.isna() & data[YEAR].notna()]
+    for _, row in coerced.iterrows():
+        report.add('coerced', f"{row['Country']} / {row['Flow']} / {row['Product']}: "
+                              f"{row[YEAR]!r} is not a number, using 0")
+    missing = data[data[YEAR].isna()]
+    for _, row in missing.iterrows():
+        report.add('coerced', f"{row['Country']} / {row['Flow']} / {row['Product']}: empty value, using 0")
+    data[YEAR] = numeric.fillna(0).astype(float)
+
+    # Duplicated rows: keep the first occurrence
+    duplicated = data.duplicated(['Country', 'Flow', 'Product'])
+    for _, row in data[duplicated].iterrows():
+        report.add('duplicate', f"{row['Country']} / {row['Flow']} / {row['Product']}: duplicate row dropped")
+    data = data[~duplicated]
+
+    # The game compares guesses on GUESS_FLOW
+    if GUESS_FLOW not in set(data['Flow']):
+        report.add('missing_flow', f"{GUESS_FLOW}: flow used to score guesses is missing")
+        raise DataValidationError(report)
+
+    # Completeness: every country needs every product reported for a flow
+    countries = sorted(data['Country'].unique())
+    dense = []
+    for flow, flow_data in data.groupby('Flow', sort=False):
+        products = list(flow_data['Product'].unique())
+        full_index = pd.MultiIndex.from_product([countries, products], names=['Country', 'Product'])
+        flow_data = flow_data.set_index(['Country', 'Product'])
+        for country, product in full_index.difference(flow_data.index):
+            report.add('missing', f"{country} / {flow} / {product}: no row, using 0")
+        flow_data = flow_data.reindex(full_index)
+        flow_data['Flow'] = flow
+        flow_data[YEAR] = flow_data[YEAR].fillna(0)
+        dense.append(flow_data.reset_index())
+    data = pd.concat(dense, ignore_index=True)[['Country', 'Product', 'Flow', YEAR]]
+
+    # Products without a color
+    for product in data['Product'].unique():
+        if product not in COLOR_PALETTE:
+            report.add('unknown_product', f"{product}: not in the color palette, using {FALLBACK_COLOR}")
+
+    # Zero totals cannot be turned into shares
+    totals = data.groupby(['Flow', 'Country'], sort=False)[YEAR].sum()
+    for (flow, country), total in totals.items():
+        if total == 0:
+            report.add('zero_total', f"{country} / {flow}: all products are 0, shares set to 0")
+
+    # Percentage share of each product within its flow and country
+    totals = data.groupby(['Flow', 'Country'], sort=False)[YEAR].transform('sum')
+    data['Percentage'] = (data[YEAR] / totals.where(totals != 0) * 100).fillna(0).round(1)
+
+    return data, report
+
+
+def load_dataset(file_path=DATA_FILE):
+    with open(file_path, 'rb') as f:
+        content = f.read()
+    energy_data = pd.read_csv(io.BytesIO(content))
+    data, report = validate(energy_data)
+    if report:
+        logger.warning("%s: %s", file_path, report)
+    return EnergyDataset(data, report, version=content_version(content), source=file_path)
+
+
+if __name__ == '__main__':
+    try:
+        _, report = validate(pd.read_csv(sys.argv[1] if len(sys.argv) > 1 else DATA_FILE))
+    except DataValidationError as exc:
+        print(exc.report)
+        sys.exit(1)
+    print(report)
@@ -0,0 +1,121 @@
+"""Game rules shared by the app and the replay tool.
+
+Target selection is driven by an explicit seed, so any game can be replayed
+and re-scored from its record.
+"""
+import json
+import random
+
+import numpy as np
+
+# Flow used to compare a guess with the target
+GUESS_FLOW = "Production (PJ)"
+MAX_ROUNDS = 5
+
+# Average share difference (in %) thresholds for the colored squares
+CLOSE_DISTANCE = 5
+MODERATE_DISTANCE = 15
+SCORE_EMOJIS = ("🟩", "🟨", "🟥")
+
+# Absolute share difference (in %) bounds for the per-product hints
+HINT_BANDS = (5, 15, 30)
+
+
+def new_seed():
+    return random.SystemRandom().randrange(2 ** 32)
+
+
+# The same seed and country list always give the same target
+def pick_target(countries, seed):
+    return random.Random(seed).choice(sorted(countries))
+
+
+# Mean absolute difference (in %) between the product shares of two countries
+def distance(shares, guess, target):
+    return float(((shares.loc[guess] - shares.loc[target]) * 100).abs().mean())
+
+
+# Distance between every pair of countries as a (guess, target) matrix;
+# shares is a country x product table or array
+def distance_matrix(shares):
+    values = np.asarray(shares)
+    return np.abs(values[:, None, :] - values[None, :, :]).mean(axis=2) * 100
+
+
+# Distance from every country to a single target, given by its row index
+def distances_to(shares, target):
+    values = np.asarray(shares)
+    return np.abs(values - values[target]).mean(axis=1) * 100
+
+
+def score_emoji(distance):
+    if distance < CLOSE_DISTANCE:
+        return SCORE_EMOJIS[0]
+    elif distance < MODERATE_DISTANCE:
+        return SCORE_EMOJIS[1]
+    else:
+        return SCORE_EMOJIS[2]
+
+
+# Vectorized score_emoji for arrays of distances
+def score_emojis(distances):
+    return np.select([distances < CLOSE_DISTANCE, distances < MODERATE_DISTANCE],
+                     SCORE_EMOJIS[:2], SCORE_EMOJIS[2])
+
+
+# Squares shown in the shareable result: one per wrong guess, or a single
+# green square for a first-round win
+def score_line(distances, correct, rounds):
+    if correct and rounds == 1:
+        return SCORE_EMOJIS[0]
+    return "".join(score_emoji(distance) for distance in distances)
+
+
+# Per-product hints for a wrong guess as (difference, text, product), largest
+# differences first; t renders messages from a locale catalog
+def product_hints(t, guess, share_difference):
+    hints = []
+    for product, diff in share_difference.items():
+        if diff == 0:
+            continue
+        size = abs(diff)
+        direction = 'less' if diff > 0 else 'more'
+        if size < HINT_BANDS[0]:
+            advice = 'advice_close'
+        elif size < HINT_BANDS[1]:
+            advice = f'advice_{direction}_slightly'
+        elif size < HINT_BANDS[2]:
+            advice = f'advice_{direction}'
+        else:
+            advice = f'advice_{direction}_much'
+        text = t('hint_higher' if diff > 0 else 'hint_lower', guess=guess, product=product, diff=size) + t(advice)
+        hints.append((diff, text, product))
+    hints.sort(key=lambda hint: abs(hint[0]), reverse=True)
+    return hints
+
+
+# How hard a target is to find: the more countries score a green or yellow
+# square against it, the more look-alikes a player has to rule out
+def puzzle_difficulty(distances, target):
+    others = np.delete(np.asarray(distances), target)
+    nearest = np.sort(others)[:MAX_ROUNDS]
+    return {
+        'close_neighbours': int((others < CLOSE_DISTANCE).sum()),
+        'moderate_neighbours': int((others < MODERATE_DISTANCE).sum()),
+        'nearest_distance': float(nearest[0]) if len(nearest) else None,
+        'mean_nearest_distance': float(nearest.mean()) if len(nearest) else None,
+        'difficulty': float((others < MODERATE_DISTANCE).mean()) if len(others) else 0.0,
+    }
+
+
+# Everything needed to replay a game, as a single JSON line
+def game_record(player, seed, target, guesses, correct, start_time=None, end_time=None):
+    return json.dumps({
+        'player': player,
+        'seed': seed,
+        'target': target,
+        'guesses': guesses,
+        'correct': correct,
+        'start_time': start_time.isoformat() if start_time else None,
+        'end_time': end_time.isoformat() if end_time else None,
+    }, ensure_ascii=False)
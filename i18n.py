@@ -0,0 +1,75 @@
+"""Localized UI and hint text.
+
+All text shown to players comes from per-locale JSON catalogs in locales/.
+Catalogs are compiled once at startup: each message becomes a bound format
+template (or a plain constant when it has no placeholders), so rendering a
+message is a dict lookup plus a single format call. Messages missing from a
+translation, or whose placeholders do not match the default locale, fall
+back to the default locale.
+"""
+import json
+import logging
+import os
+import string
+
+logger = logging.getLogger(__name__)
+
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locales')
+DEFAULT_LOCALE = 'en'
+
+
+def placeholders(text):
+    return {field.split('.')[0].split('[')[0] for _, field, _, _ in string.Formatter().parse(text) if field}
+
+
+def compile_template(text):
+    if not placeholders(text):
+        constant = text.format()
+        return lambda **kwargs: constant
+    return text.format
+
+
+class Catalog:
+    def __init__(self, locale, messages, fallback=None):
+        self.locale = locale
+        self._messages = dict(fallback._messages) if fallback is not None else {}
+        for key, text in messages.items():
+            if fallback is not None:
+                if key not in fallback._messages:
+                    logger.warning("%s: unknown message %r ignored", locale, key)
+                    continue
+                if placeholders(text) != placeholders(fallback._messages[key]):
+                    logger.warning("%s: placeholders of %r do not match %s, using %s",
+                                   locale, key, fallback.locale, fallback.locale)
+                    continue
+            self._messages[key] = text
+        if fallback is not None:
+            for key in fallback._messages.keys() - messages.keys():
+                logger.warning("%s: missing message %r, using %s", locale, key, fallback.locale)
+        self._templates = {key: compile_template(text) for key, text in self._messages.items()}
+        self.name = self._messages.get('language_name', locale)
+
+    def __call__(self, key, **kwargs):
+        return self._templates[key](**kwargs)
+
+    # Source text of a message, for callers that format it themselves
+    def text(self, key):
+        return self._messages[key]
+
+    def keys(self):
+        return self._messages.keys()
+
+
+# Compile every catalog, default locale first
+def load_catalogs(directory=LOCALES_DIR, default_locale=DEFAULT_LOCALE):
+    messages = {}
+    for file_name in sorted(os.listdir(directory)):
+        if file_name.endswith('.json'):
+            with open(os.path.join(directory, file_name), encoding='utf-8') as f:
+                messages[file_name[:-len('.json')]] = json.load(f)
+
+    default = Catalog(default_locale, messages.pop(default_locale))
+    catalogs = {default_locale: default}
+    for locale, locale_messages in messages.items():
+        catalogs[locale] = Catalog(locale, locale_messages, fallback=default)
+    return catalogs
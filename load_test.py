@@ -0,0 +1,369 @@
+"""Local load test for energy_balance_game.py.
+
+Starts the app with `streamlit run` on a free local port and drives it over
+the same websocket protocol the browser uses, with many simulated players at
+once. Each player enters a username, switches between flows, submits 5 wrong
+guesses and opens the results page. The summary email goes to a local SMTP
+stand-in, so nothing leaves the machine.
+
+For every session count the report shows rerun throughput, latency
+percentiles, CPU and RSS of the server process, and finally the saturation
+point. Server CPU and RSS are read from /proc, so run this on Linux.
+
+Usage:
+    python load_test.py --levels 1,10,50,100,500,1000
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import socketserver
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import pandas as pd
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+APP_FILE = 'energy_balance_game.py'
+DATA_FILE = 'WorldEnergyBalancesHighlights2023.csv'
+GUESSES_PER_GAME = 5
+WIDGET_TYPES = {'button', 'radio', 'selectbox', 'text_input'}
+
+
+# Minimal SMTP server that accepts everything and only counts messages
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, text):
+        self.wfile.write((text + '\r\n').encode())
+
+    def handle(self):
+        self.reply("220 localhost SMTP stand-in")
+        in_data = False
+        for raw_line in self.rfile:
+            line = raw_line.decode('utf-8', 'replace').rstrip('\r\n')
+            if in_data:
+                if line == '.':
+                    in_data = False
+                    self.server.count_message()
+                    self.reply("250 OK")
+                continue
+            verb = line.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.reply("250-localhost\r\n250 AUTH PLAIN LOGIN")
+            elif verb == 'AUTH':
+                self.reply("235 Authentication successful")
+            elif verb == 'DATA':
+                in_data = True
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+            elif verb == 'QUIT':
+                self.reply("221 Bye")
+                return
+            elif verb in ('HELO', 'MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.reply("250 OK")
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.messages = 0
+        self._lock = threading.Lock()
+
+    def count_message(self):
+        with self._lock:
+            self.messages += 1
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+# Run the app from a scratch copy of the repo so the load test secrets never
+# touch the real .streamlit/secrets.toml
+class AppServer:
+    def __init__(self, secrets):
+        self.port = free_port()
+        self.workdir = tempfile.mkdtemp(prefix='energy_wordle_load_')
+        app_dir = os.path.dirname(os.path.abspath(__file__))
+        shutil.copytree(app_dir, self.workdir, dirs_exist_ok=True,
+                        ignore=shutil.ignore_patterns('.git', '.streamlit', '__pycache__'))
+        os.makedirs(os.path.join(self.workdir, '.streamlit'))
+        with open(os.path.join(self.workdir, '.streamlit', 'secrets.toml'), 'w') as f:
+            for key, value in secrets.items():
+                if isinstance(value, bool):
+                    value = str(value).lower()
+                elif isinstance(value, str):
+                    value = f'"{value}"'
+                f.write(f"{key} = {value}\n")
+        self.process = None
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def start(self, timeout=60):
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'streamlit', 'run', APP_FILE,
+             '--server.headless', 'true',
+             '--server.port', str(self.port),
+             '--server.fileWatcherType', 'none',
+             '--browser.gatherUsageStats', 'false'],
+            cwd=self.workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"Streamlit server did not become healthy within {timeout} seconds")
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+            self.process = None
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    # CPU seconds (user + system) used so far by the server
+    def cpu_seconds(self):
+        with open(f'/proc/{self.process.pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+    # Resident set size of the server in MB
+    def rss_mb(self):
+        with open(f'/proc/{self.process.pid}/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+
+
+class RSSSampler(threading.Thread):
+    def __init__(self, server, interval=0.1):
+        super().__init__(daemon=True)
+        self.server = server
+        self.interval = interval
+        self.peak = server.rss_mb()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, self.server.rss_mb())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, self.server.rss_mb())
+        return self.peak
+
+
+# One browser tab: keeps widget values between reruns like the frontend does
+class PlayerSession:
+    def __init__(self, websocket, latencies):
+        self.websocket = websocket
+        self.latencies = latencies
+        self.widgets = {}
+        self.widget_states = {}
+
+    def set_value(self, label, value):
+        widget = self.widgets[label]
+        self.widget_states[widget.id] = WidgetState(id=widget.id, string_value=value)
+
+    async def rerun(self, click=None):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        msg.rerun_script.widget_states.widgets.extend(self.widget_states.values())
+        if click is not None:
+            msg.rerun_script.widget_states.widgets.add(id=self.widgets[click].id, trigger_value=True)
+
+        start = time.perf_counter()
+        await self.websocket.send(msg.SerializeToString())
+        widgets = {}
+        while True:
+            fwd = ForwardMsg.FromString(await self.websocket.recv())
+            kind = fwd.WhichOneof('type')
+            if kind == 'delta' and fwd.delta.WhichOneof('type') == 'new_element':
+                element_type = fwd.delta.new_element.WhichOneof('type')
+                element = getattr(fwd.delta.new_element, element_type)
+                if element_type == 'exception':
+                    raise RuntimeError(f"{element.type}: {element.message}")
+                if element_type in WIDGET_TYPES:
+                    widgets[element.label] = element
+            elif kind == 'script_finished':
+                # st.rerun() ends the run early and the server starts a new
+                # one by itself, so keep reading until a run completes
+                if fwd.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY:
+                    break
+                if fwd.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("Script failed to compile")
+                widgets = {}
+        self.latencies.append(time.perf_counter() - start)
+        self.widgets = widgets
+
+
+async def play_session(index, url, countries, flows, latencies):
+    async with websockets.connect(url, subprotocols=['streamlit'], max_size=None,
+                                  open_timeout=None, ping_interval=None) as websocket:
+        session = PlayerSession(websocket, latencies)
+
+        # Username screen
+        await session.rerun()
+        session.set_value("Enter your username to start the game:", f"player{index}")
+        await session.rerun(click="Start Game")
+
+        # Flow changes
+        for flow in flows + ["Production (PJ)"]:
+            session.set_value("Select a Flow to investigate:", flow)
+            await session.rerun()
+
+        # Wrong guesses until the game is over
+        for guess in countries[1:GUESSES_PER_GAME + 1]:
+            session.set_value("Guess the Country:", guess)
+            await session.rerun(click="Submit Guess")
+
+        # Results page
+        session.set_value("Navigation", "Explore the Results")
+        await session.rerun()
+
+
+async def run_sessions(sessions, url, countries, flows, timeout):
+    latencies = []
+    games = [asyncio.wait_for(play_session(i, url, countries, flows, latencies), timeout)
+             for i in range(sessions)]
+    outcomes = await asyncio.gather(*games, return_exceptions=True)
+    errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+    return latencies, errors
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    rank = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[rank]
+
+
+def run_level(sessions, server, countries, flows, timeout):
+    sampler = RSSSampler(server)
+    rss_before = server.rss_mb()
+    sampler.start()
+    server_cpu_start = server.cpu_seconds()
+    driver_cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+
+    latencies, errors = asyncio.run(run_sessions(sessions, server.url, countries, flows, timeout))
+
+    wall = time.perf_counter() - wall_start
+    server_cpu = server.cpu_seconds() - server_cpu_start
+    driver_cpu = time.process_time() - driver_cpu_start
+    rss_peak = sampler.stop()
+
+    if errors:
+        print(f"  {len(errors)} session(s) failed, first error: {errors[0]!r}")
+    nan = float('nan')
+    return {
+        'sessions': sessions,
+        'errors': len(errors),
+        'wall_s': wall,
+        'reruns_per_s': len(latencies) / wall,
+        'games_per_s': (sessions - len(errors)) / wall,
+        'p50_ms': percentile(latencies, 50) * 1000 if latencies else nan,
+        'p95_ms': percentile(latencies, 95) * 1000 if latencies else nan,
+        'p99_ms': percentile(latencies, 99) * 1000 if latencies else nan,
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else nan,
+        'server_cpu': server_cpu / wall,
+        'driver_cpu': driver_cpu / wall,
+        'rss_peak_mb': rss_peak,
+        'rss_per_session_mb': (rss_peak - rss_before) / sessions,
+    }
+
+
+# The saturation point is the last level before adding sessions stops buying
+# throughput, or the first level where tail latency goes over budget
+def find_saturation(results, min_gain, max_p95_ms):
+    for previous, current in zip(results, results[1:]):
+        if current['p95_ms'] > max_p95_ms:
+            return current['sessions'], f"p95 latency above {max_p95_ms:.0f} ms"
+        if current['reruns_per_s'] < previous['reruns_per_s'] * (1 + min_gain):
+            return previous['sessions'], f"throughput gain below {min_gain:.0%}"
+    return None, "not reached"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Energy Wordle app with simulated players.")
+    parser.add_argument('--levels', default='1,2,4,8,16,32,64',
+                        help="Comma separated concurrent session counts to test")
+    parser.add_argument('--flow-changes', type=int, default=3,
+                        help="Number of other flows each player looks at before guessing")
+    parser.add_argument('--timeout', type=float, default=600,
+                        help="Seconds allowed for a single game")
+    parser.add_argument('--min-gain', type=float, default=0.1,
+                        help="Minimum relative throughput gain between levels")
+    parser.add_argument('--max-p95-ms', type=float, default=1000,
+                        help="p95 rerun latency budget in milliseconds")
+    args = parser.parse_args()
+
+    energy_data = pd.read_csv(DATA_FILE)
+    countries = sorted(energy_data['Country'].unique())
+    flows = [flow for flow in energy_data['Flow'].unique() if flow != "Production (PJ)"][:args.flow_changes]
+    levels = [int(level) for level in args.levels.split(',')]
+
+    smtp = SMTPStandIn()
+    threading.Thread(target=smtp.serve_forever, daemon=True).start()
+
+    server = AppServer({
+        'smtp_user': 'loadtest@localhost',
+        'smtp_password': 'loadtest',
+        'smtp_server': '127.0.0.1',
+        'smtp_port': smtp.port,
+        'smtp_starttls': False,
+        'random_mode': False,
+        'fixed_country': countries[0],
+    })
+    server.start()
+    print(f"App server on 127.0.0.1:{server.port}, SMTP stand-in on 127.0.0.1:{smtp.port}")
+
+    print(f"{'sessions':>8} {'errors':>6} {'reruns/s':>9} {'games/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'srv cpu':>7} {'drv cpu':>7} {'rss MB':>8} {'MB/sess':>8}")
+    results = []
+    try:
+        # Warm up so imports and first-run work are not billed to the first level
+        asyncio.run(run_sessions(1, server.url, countries, flows, args.timeout))
+        for sessions in levels:
+            result = run_level(sessions, server, countries, flows, args.timeout)
+            results.append(result)
+            print(f"{result['sessions']:>8} {result['errors']:>6} {result['reruns_per_s']:>9.1f} "
+                  f"{result['games_per_s']:>8.2f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+                  f"{result['p99_ms']:>8.1f} {result['server_cpu']:>7.2f} {result['driver_cpu']:>7.2f} "
+                  f"{result['rss_peak_mb']:>8.1f} {result['rss_per_session_mb']:>8.2f}")
+    finally:
+        server.stop()
+        smtp.shutdown()
+
+    saturation, reason = find_saturation(results, args.min_gain, args.max_p95_ms)
+    if saturation is None:
+        print(f"Saturation point: {reason} (up to {levels[-1]} sessions)")
+    else:
+        print(f"Saturation point: {saturation} concurrent sessions ({reason})")
+    print(f"Summary emails received by stand-in: {smtp.messages}")
+
+
+if __name__ == '__main__':
+    main()
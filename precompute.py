@@ -0,0 +1,324 @@
+"""Parallel precomputation of every derived artifact.
+
+Builds, for the current dataset:
+  - the country distance matrix of every flow
+  - the treemap figure of every flow, country and locale
+  - the hint texts of every guess/target pair, per target and locale
+  - the puzzle difficulty score of every target country
+
+The work is spread over a process pool. Value and share tables are placed
+once in shared memory, and workers read them in place instead of receiving
+a copy. Results go to a content-addressed cache: each artifact is stored
+under the hash of its inputs (data slice, parameters, catalog text and the
+code that builds it). Artifacts whose inputs have not changed are skipped.
+manifest.json maps artifact names to cache files, and files it no longer
+references are pruned after each build of all locales. A build limited with
+--locales only prunes when asked to with --prune, since it would otherwise
+drop the still valid artifacts of the other locales.
+
+Usage:
+    python precompute.py --workers 8
+    python precompute.py --benchmark 1,2,4,8
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+import plotly
+
+from energy_data import DATA_FILE, YEAR, load_dataset, treemap_figure
+from game_engine import GUESS_FLOW, distance_matrix, distances_to, product_hints, puzzle_difficulty
+from i18n import load_catalogs
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'artifacts')
+CACHE_FILE = re.compile(r'[0-9a-f]{64}\.(json|npy)(\.\d+\.tmp)?')
+
+# Source files whose changes invalidate every artifact
+CODE_FILES = ('energy_data.py', 'game_engine.py', 'i18n.py', 'precompute.py')
+HINT_MESSAGES = ('hint_higher', 'hint_lower', 'advice_close',
+                 'advice_less_slightly', 'advice_less', 'advice_less_much',
+                 'advice_more_slightly', 'advice_more', 'advice_more_much')
+
+
+def code_fingerprint():
+    digest = hashlib.sha256(plotly.__version__.encode())
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    for file_name in CODE_FILES:
+        with open(os.path.join(app_dir, file_name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def content_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(part.tobytes())
+        else:
+            digest.update(json.dumps(part, ensure_ascii=False, sort_keys=True).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+# Read-only arrays packed into one shared memory block
+class SharedArrays:
+    def __init__(self, arrays):
+        self.layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            self.layout[name] = (offset, array.shape)
+            offset += array.size
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1) * 8)
+        block = np.ndarray((offset,), dtype=np.float64, buffer=self.shm.buf)
+        for name, array in arrays.items():
+            start, _ = self.layout[name]
+            block[start:start + array.size] = array.ravel()
+
+    @property
+    def spec(self):
+        return self.shm.name, self.layout
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach_arrays(spec):
+    name, layout = spec
+    # The parent owns the block; before Python 3.13 workers share its
+    # resource tracker, so attaching registers nothing new
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+    arrays = {}
+    for array_name, (offset, shape) in layout.items():
+        arrays[array_name] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf,
+                                        offset=offset * 8)
+        arrays[array_name].flags.writeable = False
+    return shm, arrays
+
+
+# Worker state, set once per process
+_shm = None
+_arrays = None
+_meta = None
+_catalogs = None
+
+
+def _init_worker(spec, meta):
+    global _shm, _arrays, _meta, _catalogs
+    _shm, _arrays = attach_arrays(spec)
+    _meta = meta
+    _catalogs = load_catalogs()
+
+
+def _write(path, content, binary=False):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb' if binary else 'w', encoding=None if binary else 'utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def build_artifact(task):
+    name, kind, params, path = task
+    start = time.perf_counter()
+    countries = _meta['countries']
+
+    if kind == 'distances':
+        flow_index, = params
+        matrix = distance_matrix(_arrays[f'shares/{flow_index}'])
+        buffer = io.BytesIO()
+        np.save(buffer, matrix)
+        _write(path, buffer.getvalue(), binary=True)
+
+    elif kind == 'figure':
+        flow_index, country_index, locale = params
+        flow = _meta['flows'][flow_index]
+        values = _arrays[f'values/{flow_index}'][country_index]
+        shares = _arrays[f'shares/{flow_index}'][country_index]
+        frame = pd.DataFrame({'Product': _meta['products'][flow_index], YEAR: values,
+                              'Percentage': (shares * 100).round(1)})
+        fig = treemap_figure(frame, flow, values.sum(), _meta['colors'],
+                             _catalogs[locale].text('treemap_title'))
+        _write(path, fig.to_json())
+
+    elif kind == 'hints':
+        target, locale = params
+        guess_flow = _meta['guess_flow']
+        shares = _arrays[f'shares/{guess_flow}']
+        products = _meta['products'][guess_flow]
+        hints = {}
+        for guess, guess_name in enumerate(countries):
+            if guess != target:
+                share_difference = pd.Series((shares[guess] - shares[target]) * 100, index=products)
+                hints[guess_name] = product_hints(_catalogs[locale], guess_name, share_difference)
+        _write(path, json.dumps(hints, ensure_ascii=False))
+
+    elif kind == 'difficulty':
+        target, = params
+        distances = distances_to(_arrays[f"shares/{_meta['guess_flow']}"], target)
+        _write(path, json.dumps(puzzle_difficulty(distances, target)))
+
+    return name, time.perf_counter() - start
+
+
+# Every artifact as (name, kind, params, cache path)
+def plan_artifacts(dataset, catalogs, locales, cache_dir):
+    code = code_fingerprint()
+    countries = dataset.countries
+    share_keys = {flow: content_key(dataset.shares[flow].to_numpy()) for flow in dataset.flows}
+    tasks = []
+
+    def add(name, kind, params, key, extension='json'):
+        tasks.append((name, kind, params, os.path.join(cache_dir, key[:2], f'{key}.{extension}')))
+
+    for flow_index, flow in enumerate(dataset.flows):
+        products = dataset.products(flow)
+        add(f'distances/{flow}', 'distances', (flow_index,),
+            content_key('distances', code, countries, products, share_keys[flow]), 'npy')
+        values = dataset.values[flow].to_numpy()
+        colors = {product: dataset.colors[product] for product in products}
+        for country_index, country in enumerate(countries):
+            for locale in locales:
+                add(f'figure/{flow}/{country}/{locale}', 'figure', (flow_index, country_index, locale),
+                    content_key('figure', code, flow, country, products, colors, values[country_index],
+                                catalogs[locale].text('treemap_title')))
+
+    guess_products = dataset.products(GUESS_FLOW)
+    for target, country in enumerate(countries):
+        for locale in locales:
+            messages = {key: catalogs[locale].text(key) for key in HINT_MESSAGES}
+            add(f'hints/{country}/{locale}', 'hints', (target, locale),
+                content_key('hints', code, country, countries, guess_products, share_keys[GUESS_FLOW], messages))
+        add(f'difficulty/{country}', 'difficulty', (target,),
+            content_key('difficulty', code, country, countries, share_keys[GUESS_FLOW]))
+    return tasks
+
+
+def shared_inputs(dataset):
+    arrays = {}
+    for flow_index, flow in enumerate(dataset.flows):
+        arrays[f'values/{flow_index}'] = dataset.values[flow].to_numpy(dtype=np.float64)
+        arrays[f'shares/{flow_index}'] = dataset.shares[flow].to_numpy(dtype=np.float64)
+    meta = {
+        'countries': dataset.countries,
+        'flows': dataset.flows,
+        'products': [dataset.products(flow) for flow in dataset.flows],
+        'colors': dataset.colors,
+        'guess_flow': dataset.flows.index(GUESS_FLOW),
+    }
+    return arrays, meta
+
+
+def run_pool(tasks, workers, spec, meta):
+    start = time.perf_counter()
+    if tasks:
+        chunksize = max(1, len(tasks) // (workers * 8))
+        with Pool(workers, initializer=_init_worker, initargs=(spec, meta)) as pool:
+            for _ in pool.imap_unordered(build_artifact, tasks, chunksize=chunksize):
+                pass
+    return time.perf_counter() - start
+
+
+def write_manifest(tasks, dataset, cache_dir):
+    manifest = {
+        'dataset_version': dataset.version,
+        'artifacts': {name: os.path.relpath(path, cache_dir) for name, _, _, path in tasks},
+    }
+    _write(os.path.join(cache_dir, 'manifest.json'), json.dumps(manifest, ensure_ascii=False, indent=1))
+
+
+# Remove cache files the current artifacts do not use: artifacts of earlier
+# dataset versions, code or locales, and leftovers of interrupted builds
+def prune_cache(tasks, cache_dir):
+    live = {os.path.normpath(path) for _, _, _, path in tasks}
+    removed = 0
+    for entry in os.scandir(cache_dir):
+        if not (entry.is_dir() and re.fullmatch(r'[0-9a-f]{2}', entry.name)):
+            continue
+        for file_entry in os.scandir(entry.path):
+            if CACHE_FILE.fullmatch(file_entry.name) and os.path.normpath(file_entry.path) not in live:
+                os.remove(file_entry.path)
+                removed += 1
+        if not os.listdir(entry.path):
+            os.rmdir(entry.path)
+    return removed
+
+
+# Time a full build into a fresh cache for each worker count; speedup is
+# measured against a real 1-worker build, which always runs first
+def benchmark(tasks, worker_counts, spec, meta, cache_dir):
+    worker_counts = [1] + [workers for workers in worker_counts if workers != 1]
+    print(f"{'workers':>7} {'seconds':>8} {'speedup':>8} {'efficiency':>10}")
+    baseline = None
+    for workers in worker_counts:
+        scratch = tempfile.mkdtemp(prefix='energy_wordle_bench_')
+        try:
+            scratch_tasks = [(name, kind, params, os.path.join(scratch, os.path.relpath(path, cache_dir)))
+                             for name, kind, params, path in tasks]
+            elapsed = run_pool(scratch_tasks, workers, spec, meta)
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(f"{workers:>7} {elapsed:>8.2f} {speedup:>8.2f} {speedup / workers:>10.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute derived artifacts in parallel into a cache.")
+    parser.add_argument('--data', default=DATA_FILE, help="Dataset to precompute from")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="Cache directory")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument('--locales', help="Comma separated locales (default: all catalogs)")
+    parser.add_argument('--keep-stale', action='store_true',
+                        help="Keep cache files the manifest no longer references (pruned by default)")
+    parser.add_argument('--prune', action='store_true',
+                        help="Prune even when --locales limits the build, dropping other locales' artifacts")
+    parser.add_argument('--benchmark', help="Comma separated worker counts to time a full build with")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    dataset = load_dataset(args.data)
+    catalogs = load_catalogs()
+    locales = args.locales.split(',') if args.locales else list(catalogs)
+    unknown = [locale for locale in locales if locale not in catalogs]
+    if unknown:
+        parser.error(f"unknown locale(s): {', '.join(unknown)}")
+
+    tasks = plan_artifacts(dataset, catalogs, locales, args.cache_dir)
+    arrays, meta = shared_inputs(dataset)
+    shared = SharedArrays(arrays)
+    try:
+        if args.benchmark:
+            print(f"Benchmarking a full build of {len(tasks)} artifacts on {os.cpu_count()} cores")
+            benchmark(tasks, [int(count) for count in args.benchmark.split(',')], shared.spec, meta, args.cache_dir)
+            return
+
+        pending = [task for task in tasks if not os.path.exists(task[3])]
+        print(f"{len(tasks)} artifacts for dataset {dataset.version}: "
+              f"{len(tasks) - len(pending)} up to date, {len(pending)} to build with {args.workers} workers")
+        elapsed = run_pool(pending, args.workers, shared.spec, meta)
+        write_manifest(tasks, dataset, args.cache_dir)
+        if args.prune or not (args.keep_stale or args.locales):
+            print(f"Pruned {prune_cache(tasks, args.cache_dir)} stale cache file(s)")
+        elif args.locales:
+            print("Not pruning: the build was limited with --locales (use --prune to prune anyway)")
+        print(f"Built {len(pending)} artifacts in {elapsed:.1f}s "
+              f"({time.perf_counter() - start:.1f}s total), manifest in {args.cache_dir}/manifest.json")
+    finally:
+        shared.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""Bulk re-scoring of recorded games.
+
+Reads recorded games, recomputes every guess distance and emoji score with
+the current scoring rules and dataset, and writes the results as Parquet:
+one row per guess under <out>/guesses and one row per game under <out>/games.
+The inputs are split into shards (byte ranges of JSON lines archives, whole
+summary files) that worker processes read, parse and re-score in parallel,
+with vectorized lookups into a precomputed distance matrix.
+
+Inputs can be JSON lines archives (written through the `game_archive`
+secret) or text files with saved summary emails; the format is detected
+from the content, not the file name. Both the "Record:" line and the older
+"Round N:" summaries are understood; the old app re-sent a summary on every
+rerun of the final screen, so repeats of a game are merged. Games that only
+have a seed get their target back from the seed. Files without any game are
+reported.
+
+Usage:
+    python replay.py games.jsonl saved_emails.txt --out rescored --workers 8
+"""
+import argparse
+import json
+import os
+import re
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from energy_data import DATA_FILE, load_dataset
+from game_engine import GUESS_FLOW, MAX_ROUNDS, SCORE_EMOJIS, pick_target, score_emojis
+
+
+def parse_summaries(text):
+    records = []
+    latest = {}
+    for block in re.split(r'(?m)^(?=Player: )', text):
+        if not block.startswith('Player: '):
+            continue
+        player = block.splitlines()[0][len('Player: '):].strip()
+        record = re.search(r'(?m)^Record: (.+)$', block)
+        if record:
+            records.append(json.loads(record.group(1)))
+            latest.pop(player, None)
+            continue
+
+        # Older summaries only list wrong guesses, so fewer than MAX_ROUNDS
+        # of them means the last round was the correct one
+        target = re.search(r'(?m)^Correct Country: (.+)$', block)
+        if target is None:
+            continue
+        target = target.group(1).strip()
+        guesses = [guess.strip() for guess in re.findall(r'(?m)^Round \d+: (.+)$', block)]
+        correct = len(guesses) < MAX_ROUNDS
+        if correct:
+            guesses.append(target)
+        duration = re.search(r'(?m)^Game duration: (\d+) seconds$', block)
+        duration = int(duration.group(1)) if duration else None
+
+        # The old app sent the summary again on every rerun of the final
+        # screen, so one game shows up as a run of identical summaries that
+        # only differ in duration: keep one game with the last duration
+        key = (target, tuple(guesses))
+        previous = latest.get(player)
+        if previous is not None and previous[0] == key:
+            previous[1]['duration'] = duration
+            continue
+        game = {
+            'player': player,
+            'seed': None,
+            'target': target,
+            'guesses': guesses,
+            'correct': correct,
+            'duration': duration,
+        }
+        latest[player] = (key, game)
+        records.append(game)
+    return records
+
+
+# The archive can have any name, so tell it from saved emails by its first
+# non-blank line
+def is_json_lines(path):
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                return line.lstrip().startswith(b'{')
+    return True
+
+
+# Byte ranges of the inputs as (path, start, end, json_lines). JSON lines
+# archives are split into ranges of about shard_bytes; summary files are read
+# whole so repeated summaries of a game can be merged
+def plan_shards(paths, shard_bytes):
+    for path in paths:
+        size = os.path.getsize(path)
+        if not is_json_lines(path):
+            yield path, 0, size, False
+            continue
+        for start in range(0, max(size, 1), shard_bytes):
+            yield path, start, min(start + shard_bytes, size), True
+
+
+# Records of a summary file, or of the archive lines starting in [start, end)
+def read_records(path, start=0, end=None, json_lines=None):
+    if json_lines is None:
+        json_lines = is_json_lines(path)
+    if not json_lines:
+        with open(path, encoding='utf-8') as f:
+            return parse_summaries(f.read())
+    records = []
+    with open(path, 'rb') as f:
+        if start:
+            # The line running across start belongs to the previous range
+            f.seek(start - 1)
+            f.readline()
+        while end is None or f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                records.append(json.loads(line))
+    return records
+
+
+# Split records into a games table and a long guesses table; game ids start
+# at first_game_id so ids from different shards do not collide
+def build_tables(records, countries, first_game_id=0):
+    games = pd.DataFrame.from_records(records, columns=['player', 'seed', 'target', 'guesses', 'correct',
+                                                       'start_time', 'end_time', 'duration'])
+    games.insert(0, 'game_id', np.arange(first_game_id, first_game_id + len(games), dtype=np.int64))
+
+    # Recover targets from seeds where the record does not have one
+    no_target = games['target'].isna() & games['seed'].notna()
+    games.loc[no_target, 'target'] = [pick_target(countries, int(seed)) for seed in games.loc[no_target, 'seed']]
+    games['seed'] = games['seed'].astype('Int64')
+    games['correct'] = games['correct'].fillna(False).astype(bool)
+
+    # Duration in seconds, from the summary or from the record timestamps
+    elapsed = pd.to_datetime(games['end_time']) - pd.to_datetime(games['start_time'])
+    games['duration'] = pd.to_numeric(games['duration']).fillna(elapsed.dt.total_seconds().round())
+
+    guesses = games[['game_id', 'target', 'guesses']].explode('guesses').dropna(subset=['guesses'])
+    guesses = guesses.rename(columns={'guesses': 'guess'})
+    guesses['round'] = guesses.groupby('game_id').cumcount() + 1
+    guesses = guesses[['game_id', 'round', 'guess', 'target']].reset_index(drop=True)
+
+    games['rounds'] = games['guesses'].str.len().fillna(0).astype(int)
+    return games.drop(columns='guesses'), guesses
+
+
+# Game ids of shard n start at n * GAME_ID_STRIDE
+GAME_ID_STRIDE = 10 ** 9
+
+# Worker state, set once per process
+_matrix = None
+_countries = None
+_country_index = None
+
+
+def _init_worker(matrix, countries):
+    global _matrix, _countries, _country_index
+    _matrix = matrix
+    _countries = countries
+    _country_index = pd.Index(countries)
+
+
+# Parse, build and re-score one input range in the worker
+def rescore_shard(shard):
+    shard_id, path, start, end, json_lines, out_dir = shard
+    records = read_records(path, start, end, json_lines)
+    if not records:
+        return path, 0, 0, 0
+    games, guesses = build_tables(records, _countries, shard_id * GAME_ID_STRIDE)
+
+    # Vectorized distance lookup; unknown countries get NaN
+    guess_idx = _country_index.get_indexer(guesses['guess'])
+    target_idx = _country_index.get_indexer(guesses['target'])
+    known = (guess_idx >= 0) & (target_idx >= 0)
+    distances = np.full(len(guesses), np.nan)
+    distances[known] = _matrix[guess_idx[known], target_idx[known]]
+    guesses['distance'] = distances
+    guesses['score'] = np.where(known, score_emojis(distances), None)
+
+    # Shareable score line: one square per wrong guess, a single green square
+    # for a first-round win (see game_engine.score_line)
+    wrong = guesses[known & (guesses['guess'] != guesses['target']).to_numpy()]
+    lines = wrong.groupby('game_id')['score'].agg(''.join)
+    games['score_line'] = games['game_id'].map(lines).fillna('')
+    games.loc[games['correct'] & (games['rounds'] == 1), 'score_line'] = SCORE_EMOJIS[0]
+    games['unknown_countries'] = games['game_id'].map(
+        guesses.loc[~known, 'game_id'].value_counts()).fillna(0).astype(int)
+
+    name = f'part-{shard_id:05d}.parquet'
+    guesses.to_parquet(os.path.join(out_dir, 'guesses', name), index=False)
+    games.to_parquet(os.path.join(out_dir, 'games', name), index=False)
+    return path, len(games), len(guesses), int((~known).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score recorded Energy Wordle games in bulk.")
+    parser.add_argument('inputs', nargs='+', help="JSON lines archives or saved summary emails")
+    parser.add_argument('--data', default=DATA_FILE, help="Dataset to score against")
+    parser.add_argument('--out', default='rescored', help="Output directory for the Parquet files")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument('--shard-mb', type=float, default=32, help="Megabytes of JSON lines archive per shard")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    dataset = load_dataset(args.data)
+    matrix = dataset.distances(GUESS_FLOW).to_numpy()
+
+    # Parts left by an earlier run would mix with this one
+    for table in ('guesses', 'games'):
+        table_dir = os.path.join(args.out, table)
+        os.makedirs(table_dir, exist_ok=True)
+        for name in os.listdir(table_dir):
+            if name.startswith('part-') and name.endswith('.parquet'):
+                os.remove(os.path.join(table_dir, name))
+    shards = ((shard_id, path, first, last, json_lines, args.out) for shard_id, (path, first, last, json_lines)
+              in enumerate(plan_shards(args.inputs, max(1, int(args.shard_mb * 2 ** 20)))))
+
+    games = guesses = unknown = shard_count = 0
+    games_per_file = dict.fromkeys(args.inputs, 0)
+    with Pool(args.workers, initializer=_init_worker, initargs=(matrix, dataset.countries)) as pool:
+        for path, shard_games, shard_guesses, shard_unknown in pool.imap_unordered(rescore_shard, shards):
+            games_per_file[path] += shard_games
+            games += shard_games
+            guesses += shard_guesses
+            unknown += shard_unknown
+            shard_count += 1
+
+    print(f"Re-scored {games} games with {guesses} guesses from {len(args.inputs)} file(s) "
+          f"in {shard_count} shard(s) in {time.perf_counter() - start:.1f}s, written to {args.out}/")
+    for path, file_games in games_per_file.items():
+        if not file_games:
+            print(f"Warning: no games found in {path}, it is neither a JSON lines archive nor saved summaries")
+    if unknown:
+        print(f"{unknown} guess(es) name countries missing from {args.data} and have no distance")
+
+
+if __name__ == '__main__':
+    main()